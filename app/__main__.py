@@ -1,9 +1,15 @@
-from app.main import app
-
 # Allows: python -m app
 if __name__ == "__main__":
     import uvicorn
 
     from app.settings import settings
 
-    uvicorn.run(app, host=settings.host, port=settings.port)
+    # Multiple workers need an import string so each process builds its own app.
+    uvicorn.run(
+        "app.main:app",
+        host=settings.host,
+        port=settings.port,
+        workers=settings.workers,
+        loop=settings.loop,
+        http=settings.http,
+    )
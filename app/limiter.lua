@@ -1,9 +1,10 @@
 -- Atomic token bucket.
 -- KEYS[1] = bucket key
--- ARGV[1] = now_ms
--- ARGV[2] = capacity
--- ARGV[3] = refill_rate_per_ms
--- ARGV[4] = requested_tokens
+-- ARGV[1] = capacity
+-- ARGV[2] = refill_rate_per_ms
+-- ARGV[3] = requested_tokens
+--
+-- The clock is read from Redis (TIME) so every app instance shares one time source.
 --
 -- Stored as a Redis hash:
 --   tokens (float)
@@ -11,11 +12,18 @@
 --
 -- Returns array: {allowed(0/1), tokens_left, retry_after_ms}
 
+-- TIME is non-deterministic; replicate effects rather than the script (no-op on Redis >= 5).
+if redis.replicate_commands then
+  redis.replicate_commands()
+end
+
 local key = KEYS[1]
-local now_ms = tonumber(ARGV[1])
-local capacity = tonumber(ARGV[2])
-local refill_rate_per_ms = tonumber(ARGV[3])
-local requested = tonumber(ARGV[4])
+local capacity = tonumber(ARGV[1])
+local refill_rate_per_ms = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local t = redis.call('TIME')
+local now_ms = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
 
 local data = redis.call('HMGET', key, 'tokens', 'ts_ms')
 local tokens = tonumber(data[1])
@@ -54,7 +62,12 @@ end
 
 redis.call('HMSET', key, 'tokens', tokens, 'ts_ms', ts_ms)
 -- Keep bucket keys from living forever (idle eviction). TTL ~= time-to-full + 60s.
-local ttl_ms = math.floor((capacity / math.max(refill_rate_per_ms, 0.000001)) + 60000)
-redis.call('PEXPIRE', key, ttl_ms)
+-- An idle bucket is full again after refill_full_ms, so the key only has to outlive
+-- that; refresh the TTL when it drops below it (new keys report -1) rather than on
+-- every call, which leaves roughly one PEXPIRE per minute per active key.
+local refill_full_ms = math.floor(capacity / math.max(refill_rate_per_ms, 0.000001))
+if redis.call('PTTL', key) < refill_full_ms then
+  redis.call('PEXPIRE', key, refill_full_ms + 60000)
+end
 
 return {allowed, tokens, retry_after_ms}
@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import math
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Sequence, Tuple, Union
 
 import redis
+import redis.asyncio
 
 
-@dataclass(frozen=True)
+# Read once per process and shared by every bucket. Redis keys its script cache by
+# SHA1 of the source, so compute it locally and skip the SCRIPT LOAD round-trip.
+_SCRIPT = Path(__file__).with_name("limiter.lua").read_text(encoding="utf-8")
+_SCRIPT_SHA = hashlib.sha1(_SCRIPT.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
 class RateLimitResult:
     allowed: bool
     tokens_left: float
@@ -18,7 +29,7 @@ class RateLimitResult:
 class RedisTokenBucket:
     def __init__(
         self,
-        client: redis.Redis,
+        client: redis.asyncio.Redis,
         *,
         key_prefix: str = "rl",
         capacity: int,
@@ -30,47 +41,245 @@ class RedisTokenBucket:
             raise ValueError("refill_rate_per_sec must be >= 0")
 
         self._redis = client
-        self._key_prefix = key_prefix
+        # Bound once so the hot path skips the client attribute lookups.
+        self._evalsha = client.evalsha
+        self._eval = client.eval
+        # Prebuilt "prefix:" so bucket keys are a single concatenation per request.
+        self._key_prefix = key_prefix + ":"
         self._capacity = capacity
         self._refill_rate_per_ms = refill_rate_per_sec / 1000.0
+        # redis-py would str()/repr() and encode these on every call; do it once.
+        self._capacity_arg = str(capacity).encode()
+        self._refill_rate_arg = repr(self._refill_rate_per_ms).encode()
 
-        lua_path = Path(__file__).with_name("limiter.lua")
-        self._script = lua_path.read_text(encoding="utf-8")
-        self._sha: Optional[str] = None
-
-    def _bucket_key(self, key: str) -> str:
-        return f"{self._key_prefix}:{key}"
+        self._script = _SCRIPT
+        self._sha = _SCRIPT_SHA
 
-    def allow(self, *, key: str, tokens: int = 1) -> RateLimitResult:
-        now_ms = int(time.time() * 1000)
-        bucket_key = self._bucket_key(key)
-
-        # Use EVALSHA for performance; fall back to EVAL on script cache miss.
-        args = [now_ms, self._capacity, self._refill_rate_per_ms, tokens]
-        try:
-            if self._sha is None:
-                self._sha = self._redis.script_load(self._script)
-            allowed, tokens_left, retry_after_ms = self._redis.evalsha(
-                self._sha, 1, bucket_key, *args
-            )
-        except redis.exceptions.NoScriptError:
-            allowed, tokens_left, retry_after_ms = self._redis.eval(self._script, 1, bucket_key, *args)
-            # Re-load to restore fast path.
-            self._sha = self._redis.script_load(self._script)
+    def _args(self, tokens: int) -> Tuple[bytes, bytes, bytes]:
+        token_arg = b"1" if tokens == 1 else str(tokens).encode()
+        return (self._capacity_arg, self._refill_rate_arg, token_arg)
 
+    @staticmethod
+    def _to_result(reply: Sequence) -> RateLimitResult:
+        allowed, tokens_left, retry_after_ms = reply
         return RateLimitResult(
             allowed=bool(int(allowed)),
             tokens_left=float(tokens_left),
             retry_after_ms=int(retry_after_ms),
         )
 
+    async def allow(self, *, key: str, tokens: int = 1) -> RateLimitResult:
+        bucket_key = self._key_prefix + key
+
+        # Use EVALSHA for performance; fall back to EVAL on script cache miss.
+        args = self._args(tokens)
+        try:
+            reply = await self._evalsha(self._sha, 1, bucket_key, *args)
+        except redis.exceptions.NoScriptError:
+            reply = await self._eval(self._script, 1, bucket_key, *args)
+            # EVAL caches the script server-side, so the next EVALSHA hits.
+
+        return self._to_result(reply)
+
+    async def _evalsha_pipeline(self, requests: Sequence[Tuple[str, int]]) -> list:
+        pipe = self._redis.pipeline(transaction=False)
+        for key, tokens in requests:
+            pipe.evalsha(self._sha, 1, self._key_prefix + key, *self._args(tokens))
+        return await pipe.execute(raise_on_error=False)
+
+    async def allow_many(
+        self, requests: Sequence[Tuple[str, int]]
+    ) -> list[Union[RateLimitResult, BaseException]]:
+        """Run one EVALSHA per ``(key, tokens)`` pair in a single pipelined round-trip.
+
+        Per-request errors are returned in place of the result; a transport failure
+        raises for the whole batch.
+        """
+        replies = await self._evalsha_pipeline(requests)
+
+        no_script = redis.exceptions.NoScriptError
+        missing = [i for i, reply in enumerate(replies) if isinstance(reply, no_script)]
+        if missing:
+            # Script cache was flushed: one EVAL re-primes it (and answers its own item),
+            # then the rest go back out as a single EVALSHA pipeline.
+            first = missing[0]
+            key, tokens = requests[first]
+            try:
+                replies[first] = await self._eval(
+                    self._script, 1, self._key_prefix + key, *self._args(tokens)
+                )
+            except redis.exceptions.ResponseError as exc:
+                replies[first] = exc
+            rest = missing[1:]
+            if rest:
+                retried = await self._evalsha_pipeline([requests[i] for i in rest])
+                for i, reply in zip(rest, retried):
+                    replies[i] = reply
+
+        return [
+            reply if isinstance(reply, BaseException) else self._to_result(reply)
+            for reply in replies
+        ]
+
+
+class CoalescingLimiter:
+    """Groups concurrent ``allow`` calls into pipelined batches.
+
+    Callers enqueue their request and await a future; a consumer task on the running
+    event loop collects whatever arrives within ``window_s`` (up to ``max_batch``) and
+    hands the batch to its own flush task, so up to ``max_in_flight`` pipelines can be
+    outstanding at once. The queue is bounded, and each call gives up after
+    ``timeout_s`` with ``redis.exceptions.TimeoutError`` like a direct Redis call would.
+    """
+
+    def __init__(
+        self,
+        bucket: RedisTokenBucket,
+        *,
+        window_s: float,
+        max_batch: int,
+        max_in_flight: int,
+        timeout_s: float,
+    ) -> None:
+        if window_s < 0:
+            raise ValueError("window_s must be >= 0")
+        if max_batch <= 0:
+            raise ValueError("max_batch must be > 0")
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be > 0")
+        if timeout_s <= 0:
+            raise ValueError("timeout_s must be > 0")
+
+        self._bucket = bucket
+        self._window_s = window_s
+        self._max_batch = max_batch
+        self._max_in_flight = max_in_flight
+        self._timeout_s = timeout_s
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flushes: set[asyncio.Task] = set()
+
+    def _start(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Bind queue and consumer to the loop that is actually serving requests.
+        self._loop = loop
+        # Room for every in-flight pipeline plus one batch being collected; past that,
+        # callers wait in put() rather than piling up without bound.
+        self._queue = asyncio.Queue(maxsize=self._max_batch * (self._max_in_flight + 1))
+        in_flight = asyncio.Semaphore(self._max_in_flight)
+        self._task = loop.create_task(self._run(self._queue, in_flight))
+
+    async def allow(self, *, key: str, tokens: int = 1) -> RateLimitResult:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._start(loop)
+
+        fut: asyncio.Future = loop.create_future()
+        try:
+            async with asyncio.timeout(self._timeout_s):
+                await self._queue.put((key, tokens, fut))
+                return await fut
+        except TimeoutError:
+            fut.cancel()
+            raise redis.exceptions.TimeoutError("timed out waiting for rate limit check") from None
+
+    async def _run(self, queue: asyncio.Queue, in_flight: asyncio.Semaphore) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            if self._window_s > 0:
+                await asyncio.sleep(self._window_s)
+            while len(batch) < self._max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            # Only waits when max_in_flight pipelines are already outstanding.
+            await in_flight.acquire()
+            task = loop.create_task(self._flush(batch, in_flight))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list, in_flight: asyncio.Semaphore) -> None:
+        try:
+            # Callers that timed out or disconnected must not spend tokens.
+            batch = [item for item in batch if not item[2].done()]
+            if not batch:
+                return
+            try:
+                results = await self._bucket.allow_many([(key, tokens) for key, tokens, _ in batch])
+            except Exception as exc:
+                for _, _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                return
+
+            for (_, _, fut), result in zip(batch, results):
+                if fut.done():
+                    # Caller went away while the pipeline was in flight.
+                    continue
+                if isinstance(result, BaseException):
+                    fut.set_exception(result)
+                else:
+                    fut.set_result(result)
+        finally:
+            in_flight.release()
+
+
+class ShadowDenyLimiter:
+    """Answers repeat requests from an already-throttled key without calling Redis.
+
+    When Redis denies a key it reports how long until enough tokens refill. Denials do
+    not consume tokens, so until that moment Redis would keep denying the same request;
+    the shadow replays the denial locally instead. Entries are timed from when the reply
+    arrives, so a key can be held back at most one round-trip longer than Redis would.
+    Memory is bounded by an LRU of ``max_keys`` entries.
+    """
+
+    def __init__(
+        self, limiter: Union[RedisTokenBucket, CoalescingLimiter], *, max_keys: int
+    ) -> None:
+        if max_keys <= 0:
+            raise ValueError("max_keys must be > 0")
+
+        self._limiter = limiter
+        self._max_keys = max_keys
+        # key -> (blocked_until monotonic seconds, denied token count)
+        self._blocked: OrderedDict[str, Tuple[float, int]] = OrderedDict()
+
+    async def allow(self, *, key: str, tokens: int = 1) -> RateLimitResult:
+        entry = self._blocked.get(key)
+        if entry is not None:
+            blocked_until, denied_tokens = entry
+            wait_s = blocked_until - time.monotonic()
+            if wait_s > 0 and tokens >= denied_tokens:
+                return RateLimitResult(
+                    allowed=False,
+                    tokens_left=0.0,
+                    retry_after_ms=int(math.ceil(wait_s * 1000.0)),
+                )
+            if wait_s <= 0:
+                del self._blocked[key]
+
+        result = await self._limiter.allow(key=key, tokens=tokens)
+        if not result.allowed and result.retry_after_ms > 0:
+            self._blocked[key] = (time.monotonic() + result.retry_after_ms / 1000.0, tokens)
+            self._blocked.move_to_end(key)
+            if len(self._blocked) > self._max_keys:
+                self._blocked.popitem(last=False)
+        return result
+
+
+# Retry-After values are small, so reuse interned strings instead of formatting per 429.
+_MAX_CACHED_RETRY_AFTER_S = 3600
+_RETRY_AFTER_STRS = tuple(str(s) for s in range(_MAX_CACHED_RETRY_AFTER_S + 1))
+
 
 def retry_after_header_value(retry_after_ms: int) -> Optional[str]:
     if retry_after_ms <= 0:
         return None
-    # HTTP Retry-After supports seconds; round up.
+    # HTTP Retry-After supports seconds; round up (always >= 1 here).
     seconds = (retry_after_ms + 999) // 1000
-    return str(max(1, seconds))
+    if seconds <= _MAX_CACHED_RETRY_AFTER_S:
+        return _RETRY_AFTER_STRS[seconds]
+    return str(seconds)
 
 
 def client_ip_from_headers(
@@ -82,10 +291,10 @@ def client_ip_from_headers(
         return x_real_ip.strip()
     if x_forwarded_for:
         # left-most is original client
-        return x_forwarded_for.split(",")[0].strip()
+        return x_forwarded_for.partition(",")[0].strip()
     return fallback
 
 
-def is_redis_available(err: BaseException) -> Tuple[bool, str]:
-    # Keep this simple; callers decide fail-open/closed.
-    return isinstance(err, (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)), str(err)
+def is_conn_error(err: BaseException) -> bool:
+    # Keep this simple; callers decide fail-open/closed (and whether to format the error).
+    return isinstance(err, (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError))
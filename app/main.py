@@ -1,23 +1,49 @@
 from __future__ import annotations
 
 from fastapi import FastAPI, Header, Request, Response
-from fastapi.responses import JSONResponse
-import redis
+import orjson
+import redis.asyncio
 
-from app.limiter import RedisTokenBucket, client_ip_from_headers, is_redis_available, retry_after_header_value
+from app.limiter import (
+    CoalescingLimiter,
+    RedisTokenBucket,
+    ShadowDenyLimiter,
+    client_ip_from_headers,
+    is_conn_error,
+    retry_after_header_value,
+)
 from app.settings import settings
 
 
+def _json_response(
+    content: dict, status_code: int = 200, headers: dict[str, str] | None = None
+) -> Response:
+    # Serialize with orjson straight to bytes, skipping jsonable_encoder and stdlib json.
+    return Response(
+        content=orjson.dumps(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
 def create_app() -> FastAPI:
     app = FastAPI(title="Distributed Rate Limiter", version="0.1.0")
 
-    redis_client = redis.Redis.from_url(
+    # One shared pool per process: handlers await Redis instead of parking a threadpool
+    # worker, and connections are reused across requests. The blocking pool makes callers
+    # queue for a free connection when it is exhausted instead of erroring (which would
+    # trip fail-open/fail-closed under exactly the load the limiter exists for).
+    redis_pool = redis.asyncio.BlockingConnectionPool.from_url(
         settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout_s,
         decode_responses=True,
         socket_connect_timeout=1,
         socket_timeout=1,
         retry_on_timeout=True,
     )
+    redis_client = redis.asyncio.Redis(connection_pool=redis_pool)
 
     limiter = RedisTokenBucket(
         redis_client,
@@ -25,20 +51,32 @@ def create_app() -> FastAPI:
         capacity=settings.capacity,
         refill_rate_per_sec=settings.refill_rate_per_sec,
     )
+    if settings.batch_max_size > 1:
+        limiter = CoalescingLimiter(
+            limiter,
+            window_s=settings.batch_window_ms / 1000.0,
+            max_batch=settings.batch_max_size,
+            # One outstanding pipeline per pooled connection.
+            max_in_flight=settings.redis_max_connections,
+            timeout_s=settings.batch_timeout_s,
+        )
+    if settings.shadow_max_keys > 0:
+        limiter = ShadowDenyLimiter(limiter, max_keys=settings.shadow_max_keys)
+
+    fail_closed = settings.failure_mode.lower() == "fail_closed"
 
     @app.get("/health")
-    def health() -> dict:
+    async def health() -> dict:
         try:
-            redis_client.ping()
+            await redis_client.ping()
             redis_ok = True
         except Exception:
             redis_ok = False
         return {"status": "ok", "redis": redis_ok}
 
     @app.get("/limited")
-    def limited(
+    async def limited(
         request: Request,
-        response: Response,
         x_forwarded_for: str | None = Header(default=None),
         x_real_ip: str | None = Header(default=None),
     ):
@@ -49,42 +87,45 @@ def create_app() -> FastAPI:
         )
 
         try:
-            result = limiter.allow(key=client_ip, tokens=1)
+            result = await limiter.allow(key=client_ip, tokens=1)
         except Exception as exc:
-            is_conn, msg = is_redis_available(exc)
-            if is_conn and settings.failure_mode.lower() == "fail_closed":
-                return JSONResponse(
-                    status_code=429,
-                    content={
+            if fail_closed and is_conn_error(exc):
+                return _json_response(
+                    {
                         "detail": "rate limited (redis unavailable)",
                         "mode": "fail_closed",
-                        "error": msg,
+                        "error": str(exc),
                     },
+                    status_code=429,
                 )
             # fail_open: allow request through when Redis is down
-            return {
-                "ok": True,
-                "limited": False,
-                "mode": "fail_open",
-                "note": "redis unavailable; request allowed",
-            }
+            return _json_response(
+                {
+                    "ok": True,
+                    "limited": False,
+                    "mode": "fail_open",
+                    "note": "redis unavailable; request allowed",
+                }
+            )
 
         if not result.allowed:
             headers = {}
             retry_after = retry_after_header_value(result.retry_after_ms)
             if retry_after is not None:
                 headers["Retry-After"] = retry_after
-            return JSONResponse(
-                status_code=429,
-                content={
+            return _json_response(
+                {
                     "detail": "too many requests",
                     "retry_after_ms": result.retry_after_ms,
                 },
+                status_code=429,
                 headers=headers,
             )
 
-        response.headers["X-RateLimit-Tokens-Left"] = f"{result.tokens_left:.3f}"
-        return {"ok": True, "limited": False, "client": client_ip}
+        return _json_response(
+            {"ok": True, "limited": False, "client": client_ip},
+            headers={"X-RateLimit-Tokens-Left": f"{result.tokens_left:.3f}"},
+        )
 
     return app
 
@@ -1,3 +1,6 @@
+import os
+
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -5,11 +8,23 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="RL_", case_sensitive=False)
 
     redis_url: str = "redis://redis:6379/0"
+    redis_max_connections: int = 64
+    # How long a request waits for a pooled connection before counting as a Redis failure.
+    redis_pool_timeout_s: float = 1.0
 
     # Token bucket defaults
     capacity: int = 10
     refill_rate_per_sec: float = 5.0
 
+    # Coalesce concurrent checks into one pipelined round-trip; batch_max_size=1 disables.
+    batch_window_ms: float = 1.0
+    batch_max_size: int = 64
+    # Upper bound on how long a request waits for its batched check.
+    batch_timeout_s: float = 2.0
+
+    # Remember throttled keys locally and deny repeats without a Redis call; 0 disables.
+    shadow_max_keys: int = 10_000
+
     # Keying / behavior
     key_prefix: str = "rl"
     # When Redis is unavailable: "fail_open" allows traffic; "fail_closed" throttles.
@@ -18,6 +33,10 @@ class Settings(BaseSettings):
     # HTTP server
     host: str = "0.0.0.0"
     port: int = 8000
+    workers: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    # "auto" picks uvloop / httptools when installed and falls back to asyncio / h11.
+    loop: str = "auto"
+    http: str = "auto"
 
 
 settings = Settings()
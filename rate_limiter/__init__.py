@@ -12,9 +12,17 @@ __all__ = [
 ]
 
 try:
-    from .redis_limiters import RedisSlidingWindowLimiter, RedisTokenBucketLimiter
+    from .redis_limiters import (
+        RedisSlidingWindowCounterLimiter,
+        RedisSlidingWindowLimiter,
+        RedisTokenBucketLimiter,
+    )
 
-    __all__ += ["RedisTokenBucketLimiter", "RedisSlidingWindowLimiter"]
+    __all__ += [
+        "RedisTokenBucketLimiter",
+        "RedisSlidingWindowLimiter",
+        "RedisSlidingWindowCounterLimiter",
+    ]
 except Exception:
     # Allows importing in-memory implementations without redis-py installed.
     pass
@@ -4,20 +4,17 @@ import threading
 
 
 class KeyedLock:
-    """Per-key mutex.
+    """Per-key mutex backed by a fixed table of lock stripes.
 
-    This keeps a map of key -> Lock to reduce contention vs a single global lock.
-    For simplicity it doesn't garbage-collect old locks.
+    Keys hash onto one of ``stripes`` locks, so there is no global guard to take and
+    no per-key state to grow. Two keys sharing a stripe just serialize briefly.
     """
 
-    def __init__(self) -> None:
-        self._guard = threading.Lock()
-        self._locks: dict[str, threading.Lock] = {}
+    def __init__(self, stripes: int = 1024) -> None:
+        if stripes <= 0 or stripes & (stripes - 1):
+            raise ValueError("stripes must be a power of two")
+        self._mask = stripes - 1
+        self._locks = [threading.Lock() for _ in range(stripes)]
 
     def lock_for(self, key: str) -> threading.Lock:
-        with self._guard:
-            lock = self._locks.get(key)
-            if lock is None:
-                lock = threading.Lock()
-                self._locks[key] = lock
-            return lock
+        return self._locks[hash(key) & self._mask]
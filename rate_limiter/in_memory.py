@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import math
+import threading
 import time
 from collections import deque
+from types import MappingProxyType
 
 from ._locks import KeyedLock
 from .config import SlidingWindowConfig, TokenBucketConfig
 from .results import RateLimitResult
 
+# Shared read-only metadata so each check returns a reference instead of a new dict.
+_TOKEN_BUCKET_META = MappingProxyType({"algorithm": "token_bucket", "backend": "memory"})
+
 
 class TokenBucketLimiter:
     def __init__(self, config: TokenBucketConfig) -> None:
@@ -17,9 +22,25 @@ class TokenBucketLimiter:
             raise ValueError("refill_rate must be >= 0")
 
         self._cfg = config
+        self._capacity = float(config.capacity)
+        self._refill_rate = float(config.refill_rate)
         self._locks = KeyedLock()
-        # key -> (tokens, ts)
-        self._state: dict[str, tuple[float, float]] = {}
+        # Struct-of-arrays state: key -> slot, and per-slot tokens / last refill ts.
+        # Updating a slot in place avoids building and unpacking a tuple per request.
+        self._slots: dict[str, int] = {}
+        self._tokens: list[float] = []
+        self._ts: list[float] = []
+        self._alloc_lock = threading.Lock()
+
+    def _alloc_slot(self, key: str, now: float) -> int:
+        # Callers hold the key's lock, so a key is never allocated twice; the alloc lock
+        # only orders appends from keys on different stripes.
+        with self._alloc_lock:
+            slot = len(self._tokens)
+            self._tokens.append(self._capacity)
+            self._ts.append(now)
+            self._slots[key] = slot
+        return slot
 
     def check(self, key: str, tokens: int = 1) -> RateLimitResult:
         if tokens <= 0:
@@ -27,35 +48,34 @@ class TokenBucketLimiter:
 
         now = time.monotonic()
         with self._locks.lock_for(key):
-            stored = self._state.get(key)
-            if stored is None:
-                current_tokens = float(self._cfg.capacity)
-                ts = now
-            else:
-                current_tokens, ts = stored
-
-            delta = max(0.0, now - ts)
-            refill = delta * float(self._cfg.refill_rate)
-            if refill > 0:
-                current_tokens = min(float(self._cfg.capacity), current_tokens + refill)
-                ts = now
+            # Hot path: only the first request for a key takes the allocation call.
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._alloc_slot(key, now)
+            state_tokens = self._tokens
+            state_ts = self._ts
+            rate = self._refill_rate
+            current_tokens = state_tokens[slot]
+
+            delta = now - state_ts[slot]
+            if delta > 0 and rate > 0:
+                current_tokens = min(self._capacity, current_tokens + delta * rate)
+                state_ts[slot] = now
 
             allowed = current_tokens >= tokens
             retry_after_ms = 0
             if allowed:
-                current_tokens -= float(tokens)
-            else:
-                missing = float(tokens) - current_tokens
-                if self._cfg.refill_rate > 0:
-                    retry_after_ms = int(math.ceil((missing / float(self._cfg.refill_rate)) * 1000.0))
+                current_tokens -= tokens
+            elif rate > 0:
+                retry_after_ms = int(math.ceil(((tokens - current_tokens) / rate) * 1000.0))
 
-            self._state[key] = (current_tokens, ts)
+            state_tokens[slot] = current_tokens
 
         return RateLimitResult(
             allowed=allowed,
             remaining=current_tokens,
             retry_after_ms=retry_after_ms,
-            metadata={"algorithm": "token_bucket", "backend": "memory"},
+            metadata=_TOKEN_BUCKET_META,
         )
 
     def allow(self, key: str, tokens: int = 1) -> bool:
@@ -70,48 +90,49 @@ class SlidingWindowLimiter:
             raise ValueError("max_requests must be > 0")
 
         self._cfg = config
+        self._window_size_ms = config.window_size_ms
+        self._max_requests = config.max_requests
+        self._meta = MappingProxyType(
+            {
+                "algorithm": "sliding_window_log",
+                "backend": "memory",
+                "window_size_ms": config.window_size_ms,
+            }
+        )
         self._locks = KeyedLock()
-        # key -> deque[timestamp_ms]
+        # key -> deque[timestamp_ms], bounded by max_requests
         self._state: dict[str, deque[int]] = {}
 
     def check(self, key: str) -> RateLimitResult:
         now_ms = time.monotonic_ns() // 1_000_000
-        cutoff = now_ms - self._cfg.window_size_ms
+        cutoff = now_ms - self._window_size_ms
 
         with self._locks.lock_for(key):
             q = self._state.get(key)
             if q is None:
-                q = deque()
+                q = deque(maxlen=self._max_requests)
                 self._state[key] = q
 
             while q and q[0] <= cutoff:
                 q.popleft()
 
-            if len(q) < self._cfg.max_requests:
+            if len(q) < self._max_requests:
                 q.append(now_ms)
-                remaining = float(self._cfg.max_requests - len(q))
+                remaining = float(self._max_requests - len(q))
                 return RateLimitResult(
                     allowed=True,
                     remaining=remaining,
                     retry_after_ms=0,
-                    metadata={
-                        "algorithm": "sliding_window_log",
-                        "backend": "memory",
-                        "window_size_ms": self._cfg.window_size_ms,
-                    },
+                    metadata=self._meta,
                 )
 
             oldest = q[0]
-            retry_after_ms = max(0, int(self._cfg.window_size_ms - (now_ms - oldest)))
+            retry_after_ms = max(0, int(self._window_size_ms - (now_ms - oldest)))
             return RateLimitResult(
                 allowed=False,
                 remaining=0.0,
                 retry_after_ms=retry_after_ms,
-                metadata={
-                    "algorithm": "sliding_window_log",
-                    "backend": "memory",
-                    "window_size_ms": self._cfg.window_size_ms,
-                },
+                metadata=self._meta,
             )
 
     def allow(self, key: str) -> bool:
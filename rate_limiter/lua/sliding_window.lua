@@ -1,16 +1,24 @@
 -- Atomic sliding window log using a sorted set.
 -- KEYS[1] = zset key
--- ARGV[1] = now_ms
--- ARGV[2] = window_size_ms
--- ARGV[3] = max_requests
+-- ARGV[1] = window_size_ms
+-- ARGV[2] = max_requests
+--
+-- The clock is read from Redis (TIME) so every app instance shares one time source.
 --
 -- Uses an INCR sequence key to create unique members.
 -- Returns array: {allowed(0/1), remaining, retry_after_ms}
 
+-- TIME is non-deterministic; replicate effects rather than the script (no-op on Redis >= 5).
+if redis.replicate_commands then
+  redis.replicate_commands()
+end
+
 local key = KEYS[1]
-local now_ms = tonumber(ARGV[1])
-local window_ms = tonumber(ARGV[2])
-local max_requests = tonumber(ARGV[3])
+local window_ms = tonumber(ARGV[1])
+local max_requests = tonumber(ARGV[2])
+
+local t = redis.call('TIME')
+local now_ms = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
 
 local cutoff = now_ms - window_ms
 redis.call('ZREMRANGEBYSCORE', key, 0, cutoff)
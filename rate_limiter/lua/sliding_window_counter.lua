@@ -0,0 +1,55 @@
+-- Approximate sliding window using two fixed-window counters.
+-- KEYS[1] = counter key prefix
+-- ARGV[1] = window_size_ms
+-- ARGV[2] = max_requests
+--
+-- Counters live at KEYS[1] .. ':' .. window_index. The previous window's count is
+-- weighted by how much of it still overlaps the sliding window:
+--   approx = prev * (window - elapsed) / window + cur
+-- O(1) per call and two small string keys per client, instead of one ZSET member
+-- per request. Assumes requests in the previous window were evenly spread.
+--
+-- The clock is read from Redis (TIME) so every app instance shares one time source.
+-- Returns array: {allowed(0/1), remaining, retry_after_ms}
+
+-- TIME is non-deterministic; replicate effects rather than the script (no-op on Redis >= 5).
+if redis.replicate_commands then
+  redis.replicate_commands()
+end
+
+local key = KEYS[1]
+local window_ms = tonumber(ARGV[1])
+local max_requests = tonumber(ARGV[2])
+
+local t = redis.call('TIME')
+local now_ms = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local window_index = math.floor(now_ms / window_ms)
+local elapsed = now_ms - window_index * window_ms
+local cur_key = key .. ':' .. window_index
+local prev_key = key .. ':' .. (window_index - 1)
+
+local cur = tonumber(redis.call('GET', cur_key)) or 0
+local prev = tonumber(redis.call('GET', prev_key)) or 0
+
+local approx = prev * ((window_ms - elapsed) / window_ms) + cur
+
+if approx + 1 <= max_requests then
+  -- The counter is read as "prev" during the following window, so keep it for two.
+  if redis.call('INCR', cur_key) == 1 then
+    redis.call('PEXPIRE', cur_key, window_ms * 2)
+  end
+  return {1, math.floor(max_requests - approx - 1), 0}
+end
+
+-- Earliest time at which approx + 1 <= max_requests again.
+local retry_after_ms
+if cur + 1 <= max_requests then
+  -- Still within this window, once enough of prev has slid out.
+  retry_after_ms = window_ms - (max_requests - cur - 1) * window_ms / prev - elapsed
+else
+  -- Next window: cur becomes prev and must slide out far enough.
+  retry_after_ms = (window_ms - elapsed) + window_ms * (1 - (max_requests - 1) / cur)
+end
+
+return {0, 0, math.max(0, math.ceil(retry_after_ms))}
@@ -1,26 +1,46 @@
 from __future__ import annotations
 
-import time
+import hashlib
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
 
 import redis
 
 from .config import RedisConfig, SlidingWindowConfig, TokenBucketConfig
 from .results import RateLimitResult
 
+# Shared read-only metadata for the success path; failure results still carry the error.
+_TOKEN_BUCKET_META = MappingProxyType({"algorithm": "token_bucket", "backend": "redis"})
+_SLIDING_WINDOW_META = MappingProxyType({"algorithm": "sliding_window_log", "backend": "redis"})
+_SLIDING_WINDOW_COUNTER_META = MappingProxyType(
+    {"algorithm": "sliding_window_counter", "backend": "redis"}
+)
+
 
 @dataclass(frozen=True)
 class _LuaScript:
     source: str
-    sha: Optional[str] = None
+    sha: str
 
 
 def _load_script_text(path: Path) -> str:
     return path.read_text(encoding="utf-8")
 
 
+def _load_script(path: Path) -> _LuaScript:
+    source = _load_script_text(path)
+    # Same digest Redis uses for its script cache, so EVALSHA works without SCRIPT LOAD.
+    return _LuaScript(source=source, sha=hashlib.sha1(source.encode("utf-8")).hexdigest())
+
+
+# Loaded once per process and shared by every limiter instance.
+_LUA_DIR = Path(__file__).with_name("lua")
+_TOKEN_BUCKET_SCRIPT = _load_script(_LUA_DIR / "token_bucket.lua")
+_SLIDING_WINDOW_SCRIPT = _load_script(_LUA_DIR / "sliding_window.lua")
+_SLIDING_WINDOW_COUNTER_SCRIPT = _load_script(_LUA_DIR / "sliding_window_counter.lua")
+
+
 class RedisTokenBucketLimiter:
     def __init__(
         self,
@@ -35,6 +55,7 @@ class RedisTokenBucketLimiter:
 
         self._cfg = config
         self._redis_cfg = redis_config
+        self._key_prefix = redis_config.key_prefix
         self._redis = client or redis.Redis.from_url(
             redis_config.redis_url(),
             decode_responses=True,
@@ -42,32 +63,32 @@ class RedisTokenBucketLimiter:
             socket_timeout=redis_config.socket_timeout_s,
             retry_on_timeout=True,
         )
+        # Bound once so the hot path skips the client attribute lookups.
+        self._evalsha = self._redis.evalsha
+        self._eval = self._redis.eval
 
-        lua_path = Path(__file__).with_name("lua") / "token_bucket.lua"
-        self._script = _LuaScript(source=_load_script_text(lua_path))
+        # Pre-encoded constant ARGV so redis-py does not re-format them per call.
+        self._capacity_arg = str(config.capacity).encode()
+        self._refill_rate_arg = repr(config.refill_rate / 1000.0).encode()
 
-    def _key(self, key: str) -> str:
-        return f"{self._redis_cfg.key_prefix}{key}"
+        self._script = _TOKEN_BUCKET_SCRIPT
 
     def check(self, key: str, tokens: int = 1) -> RateLimitResult:
         if tokens <= 0:
             raise ValueError("tokens must be > 0")
 
-        now_ms = int(time.time() * 1000)
-        bucket_key = self._key(key)
-        args = [now_ms, self._cfg.capacity, self._cfg.refill_rate / 1000.0, tokens]
+        bucket_key = self._key_prefix + key
+        token_arg = b"1" if tokens == 1 else str(tokens).encode()
+        args = (self._capacity_arg, self._refill_rate_arg, token_arg)
 
         try:
-            if self._script.sha is None:
-                object.__setattr__(self._script, "sha", self._redis.script_load(self._script.source))
-            allowed, tokens_left, retry_after_ms = self._redis.evalsha(
+            allowed, tokens_left, retry_after_ms = self._evalsha(
                 self._script.sha, 1, bucket_key, *args
             )
         except redis.exceptions.NoScriptError:
-            allowed, tokens_left, retry_after_ms = self._redis.eval(
+            allowed, tokens_left, retry_after_ms = self._eval(
                 self._script.source, 1, bucket_key, *args
             )
-            object.__setattr__(self._script, "sha", self._redis.script_load(self._script.source))
         except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as exc:
             if self._redis_cfg.fail_open:
                 return RateLimitResult(
@@ -97,7 +118,7 @@ class RedisTokenBucketLimiter:
             allowed=bool(int(allowed)),
             remaining=float(tokens_left),
             retry_after_ms=int(retry_after_ms),
-            metadata={"algorithm": "token_bucket", "backend": "redis"},
+            metadata=_TOKEN_BUCKET_META,
         )
 
     def allow(self, key: str, tokens: int = 1) -> bool:
@@ -105,6 +126,11 @@ class RedisTokenBucketLimiter:
 
 
 class RedisSlidingWindowLimiter:
+    # Subclasses swap in another script with the same KEYS/ARGV/reply contract.
+    _script = _SLIDING_WINDOW_SCRIPT
+    _algorithm = "sliding_window_log"
+    _meta = _SLIDING_WINDOW_META
+
     def __init__(
         self,
         config: SlidingWindowConfig,
@@ -118,6 +144,7 @@ class RedisSlidingWindowLimiter:
 
         self._cfg = config
         self._redis_cfg = redis_config
+        self._key_prefix = redis_config.key_prefix
         self._redis = client or redis.Redis.from_url(
             redis_config.redis_url(),
             decode_responses=True,
@@ -125,29 +152,25 @@ class RedisSlidingWindowLimiter:
             socket_timeout=redis_config.socket_timeout_s,
             retry_on_timeout=True,
         )
+        # Bound once so the hot path skips the client attribute lookups.
+        self._evalsha = self._redis.evalsha
+        self._eval = self._redis.eval
 
-        lua_path = Path(__file__).with_name("lua") / "sliding_window.lua"
-        self._script = _LuaScript(source=_load_script_text(lua_path))
-
-    def _key(self, key: str) -> str:
-        return f"{self._redis_cfg.key_prefix}{key}"
+        # Pre-encoded constant ARGV so redis-py does not re-format them per call.
+        self._args = (str(config.window_size_ms).encode(), str(config.max_requests).encode())
 
     def check(self, key: str) -> RateLimitResult:
-        now_ms = int(time.time() * 1000)
-        zset_key = self._key(key)
-        args = [now_ms, self._cfg.window_size_ms, self._cfg.max_requests]
+        window_key = self._key_prefix + key
+        args = self._args
 
         try:
-            if self._script.sha is None:
-                object.__setattr__(self._script, "sha", self._redis.script_load(self._script.source))
-            allowed, remaining, retry_after_ms = self._redis.evalsha(
-                self._script.sha, 1, zset_key, *args
+            allowed, remaining, retry_after_ms = self._evalsha(
+                self._script.sha, 1, window_key, *args
             )
         except redis.exceptions.NoScriptError:
-            allowed, remaining, retry_after_ms = self._redis.eval(
-                self._script.source, 1, zset_key, *args
+            allowed, remaining, retry_after_ms = self._eval(
+                self._script.source, 1, window_key, *args
             )
-            object.__setattr__(self._script, "sha", self._redis.script_load(self._script.source))
         except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as exc:
             if self._redis_cfg.fail_open:
                 return RateLimitResult(
@@ -155,7 +178,7 @@ class RedisSlidingWindowLimiter:
                     remaining=float("inf"),
                     retry_after_ms=0,
                     metadata={
-                        "algorithm": "sliding_window_log",
+                        "algorithm": self._algorithm,
                         "backend": "redis",
                         "mode": "fail_open",
                         "error": str(exc),
@@ -166,7 +189,7 @@ class RedisSlidingWindowLimiter:
                 remaining=0.0,
                 retry_after_ms=0,
                 metadata={
-                    "algorithm": "sliding_window_log",
+                    "algorithm": self._algorithm,
                     "backend": "redis",
                     "mode": "fail_closed",
                     "error": str(exc),
@@ -177,8 +200,20 @@ class RedisSlidingWindowLimiter:
             allowed=bool(int(allowed)),
             remaining=float(remaining),
             retry_after_ms=int(retry_after_ms),
-            metadata={"algorithm": "sliding_window_log", "backend": "redis"},
+            metadata=self._meta,
         )
 
     def allow(self, key: str) -> bool:
         return self.check(key).allowed
+
+
+class RedisSlidingWindowCounterLimiter(RedisSlidingWindowLimiter):
+    """Sliding window approximated from the current and previous fixed-window counts.
+
+    Constant time and memory per key, at the cost of assuming requests in the previous
+    window were evenly spread. Use :class:`RedisSlidingWindowLimiter` for an exact log.
+    """
+
+    _script = _SLIDING_WINDOW_COUNTER_SCRIPT
+    _algorithm = "sliding_window_counter"
+    _meta = _SLIDING_WINDOW_COUNTER_META
@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from typing import Any, Mapping, Optional
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RateLimitResult:
     allowed: bool
     remaining: float
@@ -20,9 +20,16 @@ class RateLimitResult:
         }
 
 
+# Retry-After values are small, so reuse interned strings instead of formatting per 429.
+_MAX_CACHED_RETRY_AFTER_S = 3600
+_RETRY_AFTER_STRS = tuple(str(s) for s in range(_MAX_CACHED_RETRY_AFTER_S + 1))
+
+
 def retry_after_header_value(retry_after_ms: int) -> Optional[str]:
     if retry_after_ms <= 0:
         return None
-    # HTTP Retry-After supports seconds; round up.
+    # HTTP Retry-After supports seconds; round up (always >= 1 here).
     seconds = (retry_after_ms + 999) // 1000
-    return str(max(1, seconds))
+    if seconds <= _MAX_CACHED_RETRY_AFTER_S:
+        return _RETRY_AFTER_STRS[seconds]
+    return str(seconds)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+import redis
+
+from app.limiter import CoalescingLimiter, RateLimitResult
+
+
+class FakeBucket:
+    def __init__(self, delay: float = 0.0, fail: Exception | None = None) -> None:
+        self.delay = delay
+        self.fail = fail
+        self.batches: list[list[tuple[str, int]]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def allow_many(self, requests):
+        self.batches.append(list(requests))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail is not None:
+                raise self.fail
+            return [
+                ValueError(key) if key == "bad" else RateLimitResult(True, float(tokens), 0)
+                for key, tokens in requests
+            ]
+        finally:
+            self.in_flight -= 1
+
+
+def _limiter(bucket: FakeBucket, **kwargs) -> CoalescingLimiter:
+    opts = {"window_s": 0.01, "max_batch": 4, "max_in_flight": 4, "timeout_s": 1.0}
+    opts.update(kwargs)
+    return CoalescingLimiter(bucket, **opts)
+
+
+def test_coalescing_batches_up_to_max_batch() -> None:
+    bucket = FakeBucket()
+    limiter = _limiter(bucket)
+
+    async def main() -> list[RateLimitResult]:
+        return await asyncio.gather(*[limiter.allow(key=f"k{i}", tokens=i) for i in range(1, 11)])
+
+    results = asyncio.run(main())
+
+    assert [r.tokens_left for r in results] == [float(i) for i in range(1, 11)]
+    assert [len(b) for b in bucket.batches] == [4, 4, 2]
+
+
+def test_coalescing_runs_pipelines_concurrently() -> None:
+    bucket = FakeBucket(delay=0.05)
+    limiter = _limiter(bucket, window_s=0.0, max_batch=2, max_in_flight=3)
+
+    async def main() -> None:
+        await asyncio.gather(*[limiter.allow(key=f"k{i}") for i in range(12)])
+
+    asyncio.run(main())
+    assert bucket.max_in_flight == 3
+
+
+def test_coalescing_per_item_exception_only_fails_that_caller() -> None:
+    limiter = _limiter(FakeBucket())
+
+    async def main() -> list:
+        return await asyncio.gather(
+            limiter.allow(key="ok"), limiter.allow(key="bad"), return_exceptions=True
+        )
+
+    ok, bad = asyncio.run(main())
+    assert isinstance(ok, RateLimitResult)
+    assert isinstance(bad, ValueError)
+
+
+def test_coalescing_transport_failure_fails_whole_batch() -> None:
+    limiter = _limiter(FakeBucket(fail=redis.exceptions.ConnectionError("down")))
+
+    async def main() -> list:
+        calls = [limiter.allow(key=f"k{i}") for i in range(3)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, redis.exceptions.ConnectionError) for r in results)
+
+
+def test_coalescing_cancelled_caller_is_not_sent() -> None:
+    bucket = FakeBucket()
+    limiter = _limiter(bucket, window_s=0.05)
+
+    async def main() -> RateLimitResult:
+        gone = asyncio.ensure_future(limiter.allow(key="gone"))
+        kept = asyncio.ensure_future(limiter.allow(key="kept"))
+        await asyncio.sleep(0.01)
+        gone.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await gone
+        return await kept
+
+    result = asyncio.run(main())
+    assert result.allowed is True
+    assert bucket.batches == [[("kept", 1)]]
+
+
+def test_coalescing_times_out_like_redis() -> None:
+    limiter = _limiter(FakeBucket(delay=1.0), timeout_s=0.05)
+
+    async def main() -> None:
+        await limiter.allow(key="slow")
+
+    with pytest.raises(redis.exceptions.TimeoutError):
+        asyncio.run(main())
@@ -25,3 +25,14 @@ def test_sliding_window_allows_after_window_passes() -> None:
 
     time.sleep(0.18)
     assert limiter.allow(key) is True
+
+
+def test_sliding_window_remaining_recovers_after_window_passes() -> None:
+    limiter = SlidingWindowLimiter(SlidingWindowConfig(window_size_ms=150, max_requests=3))
+    key = "k"
+
+    assert limiter.check(key).remaining == 2.0
+    assert limiter.check(key).remaining == 1.0
+
+    time.sleep(0.18)
+    assert limiter.check(key).remaining == 2.0
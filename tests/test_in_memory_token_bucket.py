@@ -24,3 +24,12 @@ def test_token_bucket_refills_over_time() -> None:
 
     time.sleep(0.12)
     assert limiter.allow(key) is True
+
+
+def test_token_bucket_keys_are_independent() -> None:
+    limiter = TokenBucketLimiter(TokenBucketConfig(capacity=1, refill_rate=0))
+
+    assert limiter.allow("a") is True
+    assert limiter.allow("a") is False
+    assert limiter.allow("b") is True
+    assert limiter.check("a").remaining == 0.0
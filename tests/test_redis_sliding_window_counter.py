@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from rate_limiter import RedisConfig, RedisSlidingWindowCounterLimiter, SlidingWindowConfig
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+# A whole second, so window boundaries (window_size_ms=1000) fall on exact offsets.
+BASE_S = 1_700_000_000.0
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch):
+    """Pins the time fakeredis reports for TIME inside the Lua script."""
+    now = [BASE_S]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def _limiter() -> RedisSlidingWindowCounterLimiter:
+    return RedisSlidingWindowCounterLimiter(
+        SlidingWindowConfig(window_size_ms=1000, max_requests=10),
+        RedisConfig(key_prefix="c:"),
+        client=fakeredis.FakeRedis(decode_responses=True),
+    )
+
+
+def test_counter_retry_while_previous_window_slides_out(clock) -> None:
+    limiter = _limiter()
+    for _ in range(10):
+        assert limiter.allow("k") is True
+
+    # Halfway into the next window the previous 10 hits weigh 5, leaving room for 5 more.
+    clock[0] = BASE_S + 1.5
+    for _ in range(5):
+        assert limiter.allow("k") is True
+    r = limiter.check("k")
+    assert r.allowed is False
+    # 10 * (1000 - e) / 1000 + 5 + 1 <= 10 once e >= 600, i.e. 100 ms from now.
+    assert r.retry_after_ms == 100
+
+    clock[0] = BASE_S + 1.6
+    assert limiter.allow("k") is True
+
+
+def test_counter_retry_when_current_window_is_full(clock) -> None:
+    limiter = _limiter()
+    clock[0] = BASE_S + 0.2
+    for _ in range(10):
+        assert limiter.allow("k") is True
+    r = limiter.check("k")
+    assert r.allowed is False
+    # 800 ms to the next window, then 10 * (1000 - e) / 1000 + 1 <= 10 once e >= 100.
+    assert r.retry_after_ms == 900
+
+    clock[0] = BASE_S + 1.1
+    assert limiter.allow("k") is True
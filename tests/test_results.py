@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from rate_limiter.results import retry_after_header_value
+
+
+def test_retry_after_header_rounds_up_to_seconds() -> None:
+    assert retry_after_header_value(0) is None
+    assert retry_after_header_value(1) == "1"
+    assert retry_after_header_value(1000) == "1"
+    assert retry_after_header_value(1001) == "2"
+
+
+def test_retry_after_header_beyond_cached_range() -> None:
+    assert retry_after_header_value(3_600_000) == "3600"
+    assert retry_after_header_value(3_600_001) == "3601"
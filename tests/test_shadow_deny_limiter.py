@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from app.limiter import RateLimitResult, ShadowDenyLimiter
+
+
+class StubLimiter:
+    """Denies every key in ``denied`` with a fixed retry_after_ms; allows the rest."""
+
+    def __init__(self, denied: set[str], retry_after_ms: int = 1000) -> None:
+        self.denied = denied
+        self.retry_after_ms = retry_after_ms
+        self.calls: list[tuple[str, int]] = []
+
+    async def allow(self, *, key: str, tokens: int = 1) -> RateLimitResult:
+        self.calls.append((key, tokens))
+        if key in self.denied:
+            return RateLimitResult(False, 0.0, self.retry_after_ms)
+        return RateLimitResult(True, 1.0, 0)
+
+
+def test_shadow_repeats_inside_window_skip_backend() -> None:
+    stub = StubLimiter({"k"})
+    shadow = ShadowDenyLimiter(stub, max_keys=10)
+
+    first = asyncio.run(shadow.allow(key="k"))
+    second = asyncio.run(shadow.allow(key="k"))
+
+    assert first.allowed is False and second.allowed is False
+    assert 0 < second.retry_after_ms <= 1000
+    assert stub.calls == [("k", 1)]
+
+
+def test_shadow_smaller_request_still_reaches_backend() -> None:
+    stub = StubLimiter({"k"})
+    shadow = ShadowDenyLimiter(stub, max_keys=10)
+
+    asyncio.run(shadow.allow(key="k", tokens=3))
+    asyncio.run(shadow.allow(key="k", tokens=1))
+
+    assert stub.calls == [("k", 3), ("k", 1)]
+
+
+def test_shadow_expired_entry_is_deleted() -> None:
+    stub = StubLimiter({"k"}, retry_after_ms=20)
+    shadow = ShadowDenyLimiter(stub, max_keys=10)
+
+    asyncio.run(shadow.allow(key="k"))
+    time.sleep(0.04)
+    stub.denied.clear()
+    result = asyncio.run(shadow.allow(key="k"))
+
+    assert result.allowed is True
+    assert stub.calls == [("k", 1), ("k", 1)]
+    assert "k" not in shadow._blocked
+
+
+def test_shadow_lru_evicts_at_max_keys() -> None:
+    stub = StubLimiter({"a", "b", "c"})
+    shadow = ShadowDenyLimiter(stub, max_keys=2)
+
+    for key in ("a", "b", "c"):
+        asyncio.run(shadow.allow(key=key))
+
+    assert list(shadow._blocked) == ["b", "c"]
+    asyncio.run(shadow.allow(key="a"))
+    assert stub.calls[-1] == ("a", 1)